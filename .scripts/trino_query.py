@@ -5,48 +5,84 @@ Simple interactive Trino query runner over HTTP.
 
 import json
 import sys
-import urllib.request
-from typing import Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterator
 
+import urllib3
+
+try:
+    # Optional: orjson is much faster on large result sets, esp. pretty-printing
+    import orjson
+
+    json_loads = orjson.loads
+
+    def dumps_pretty(obj: Any) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode("utf-8")
+except ImportError:
+    json_loads = json.loads
+
+    def dumps_pretty(obj: Any) -> str:
+        return json.dumps(obj, indent=2)
 
 TRINO_URL = "http://localhost:8084/v1/statement"
 TRINO_USER = "admin"
 
+# Shared pool so the nextUri polling chain reuses one keep-alive connection.
+POOL = urllib3.PoolManager(num_pools=2, maxsize=2)
+
+
+def _json(resp: urllib3.BaseHTTPResponse) -> dict[str, Any]:
+    if resp.status >= 400:
+        raise RuntimeError(f"HTTP {resp.status}: {resp.data.decode('utf-8', 'replace').strip()}")
+    return json_loads(resp.data)
+
 
 def trino_post(sql: str) -> dict[str, Any]:
-    req = urllib.request.Request(
+    resp = POOL.request(
+        "POST",
         TRINO_URL,
-        data=sql.encode("utf-8"),
+        body=sql.encode("utf-8"),
         headers={
             "X-Trino-User": TRINO_USER,
             "Content-Type": "text/plain",
         },
-        method="POST",
     )
-    with urllib.request.urlopen(req) as resp:
-        return json.load(resp)
+    return _json(resp)
 
 
 def trino_get(uri: str) -> dict[str, Any]:
-    with urllib.request.urlopen(uri) as resp:
-        return json.load(resp)
+    return _json(POOL.request("GET", uri))
 
 
-def run_query(sql: str) -> tuple[list[dict[str, Any]] | None, list[list[Any]], dict[str, Any]]:
+def iter_pages(sql: str) -> Iterator[dict[str, Any]]:
+    """
+    Yield Trino response pages in order, prefetching the next nextUri page
+    while the caller handles the current one. Stops after an error page.
+    """
     payload = trino_post(sql)
-    columns = payload.get("columns")
-    rows = payload.get("data", []) or []
-    next_uri = payload.get("nextUri")
-    last_payload = payload
+    with ThreadPoolExecutor(max_workers=1) as prefetch:
+        while True:
+            next_uri = payload.get("nextUri")
+            upcoming = None
+            if next_uri and "error" not in payload:
+                upcoming = prefetch.submit(trino_get, next_uri)
+            yield payload
+            if upcoming is None:
+                return
+            payload = upcoming.result()
+
+
+def run_query(sql: str) -> tuple[list[dict[str, Any]] | None, list[list[Any]], dict[str, Any]]:
+    columns = None
+    rows: list[list[Any]] = []
+    last_payload: dict[str, Any] = {}
 
-    while next_uri:
-        payload = trino_get(next_uri)
+    for payload in iter_pages(sql):
         last_payload = payload
         if "error" in payload:
             break
         columns = columns or payload.get("columns")
         rows.extend(payload.get("data", []) or [])
-        next_uri = payload.get("nextUri")
 
     return columns, rows, last_payload
 
@@ -70,17 +106,17 @@ def main() -> int:
 
         if "error" in last_payload:
             print("ERROR:")
-            print(json.dumps(last_payload.get("error"), indent=2))
+            print(dumps_pretty(last_payload.get("error")))
             continue
 
         if columns:
             print("COLUMNS:")
-            print(json.dumps(columns, indent=2))
+            print(dumps_pretty(columns))
         else:
             print("COLUMNS: []")
 
         print("ROWS:")
-        print(json.dumps(rows, indent=2))
+        print(dumps_pretty(rows))
 
     return 0
 
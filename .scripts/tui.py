@@ -3,9 +3,22 @@ import os
 import time
 import re
 import json
-import requests
-from typing import List, Tuple, Optional
-from datetime import datetime
+import select
+import signal
+import functools
+import urllib3
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from heapq import nlargest
+from itertools import chain
+from operator import itemgetter
+from typing import Callable, Dict, Iterator, List, NamedTuple, Tuple, Optional
+
+try:
+    # Optional: orjson parses the per-row JSON and Loki payloads much faster
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
 
 from rich.console import Console
 from rich.table import Table
@@ -22,12 +35,16 @@ DS_LOKI = int(os.getenv("DS_LOKI_ID", "2"))
 
 REFRESH = float(os.getenv("REFRESH", "2.0"))
 
-# ✅ TUI default query (NO line_format; we parse JSON locally)
-# Shows "meaningful stuff": token mint + hello call via envoy structured logs
+# ✅ TUI default query (NO line_format)
+# Shows "meaningful stuff": token mint + hello call via envoy structured logs.
+# The json stage extracts only the fields we render; Loki returns them as
+# stream labels, so the TUI doesn't have to re-parse each line locally.
 LOKI_QUERY = os.getenv(
     "LOKI_QUERY",
     '{app="envoy", namespace=~".+", namespace!~"observability|argocd|kube-system"}'
-    ' | json | method="POST" | upstream=~"keycloak|hello_upstream"'
+    ' | json authority="authority", method="method", path="path", status="status",'
+    ' upstream="upstream", req_id="req_id", request_id="request_id"'
+    ' | method="POST" | upstream=~"keycloak|hello_upstream"'
 )
 
 # Fallback if query fails
@@ -36,6 +53,20 @@ LOKI_FALLBACK_QUERY = os.getenv("LOKI_FALLBACK_QUERY", '{app=~".+"}')
 LOKI_LIMIT = int(os.getenv("LOKI_LIMIT", "80"))
 LOKI_WINDOW_SEC = int(os.getenv("LOKI_WINDOW_SEC", "900"))
 
+# Incremental tail re-reads this many seconds before the newest held line,
+# so lines ingested slightly out of order are not skipped
+LOKI_OVERLAP_SEC = int(os.getenv("LOKI_OVERLAP_SEC", "5"))
+
+# Dedicated Loki probe only after this many consecutive tail failures
+LOKI_PROBE_AFTER = int(os.getenv("LOKI_PROBE_AFTER", "3"))
+
+# Max seconds a frame waits on a health probe once the tail is in; a slower
+# probe stays in flight and is picked up by a later frame
+PROBE_WAIT = float(os.getenv("PROBE_WAIT", "1.0"))
+
+# A successful Grafana health probe is reused for this long (seconds)
+GRAFANA_HEALTH_TTL = float(os.getenv("HEALTH_TTL", "30"))
+
 # Visual tuning
 MAX_PATH_LEN = int(os.getenv("MAX_PATH_LEN", "60"))
 MAX_UPSTREAM_LEN = int(os.getenv("MAX_UPSTREAM_LEN", "18"))
@@ -47,28 +78,65 @@ console = Console()
 # -----------------------------------------------------------------------------
 # HTTP helpers
 # -----------------------------------------------------------------------------
-def _get(path: str, params=None, timeout=8) -> requests.Response:
-    return requests.get(f"{GRAFANA}{path}", params=params, timeout=timeout)
+# One keep-alive pool for all Grafana calls (health + datasource proxy),
+# so every refresh reuses the pooled socket instead of reconnecting.
+# Plain urllib3 skips requests' per-call session/hook/redirect machinery and
+# never consults proxy/netrc env (Grafana is a local port-forward).
+# No retries: a failed request just shows up in the banner and the next
+# frame tries again, instead of stalling this one with backoff sleeps.
+POOL = urllib3.PoolManager(
+    num_pools=4,
+    maxsize=16,
+    headers={"Accept-Encoding": "gzip"},
+    retries=False,
+)
 
+def _get(path: str, params=None, timeout=8) -> urllib3.BaseHTTPResponse:
+    return POOL.request("GET", f"{GRAFANA}{path}", fields=params, timeout=timeout)
+
+# probe -> (monotonic ts, result) of its last successful run
+_PROBE_CACHE: Dict[Callable, Tuple[float, Tuple[bool, str]]] = {}
+
+def ttl_cache(ttl: float):
+    # Reuse a successful (ok, msg) probe result for `ttl` seconds. Failures
+    # are never cached, so a broken endpoint is re-probed on the next call.
+    def decorate(probe: Callable[[], Tuple[bool, str]]):
+        @functools.wraps(probe)
+        def cached() -> Tuple[bool, str]:
+            hit = _PROBE_CACHE.get(probe)
+            if hit and time.monotonic() - hit[0] < ttl:
+                return hit[1]
+            result = probe()
+            if result[0]:
+                _PROBE_CACHE[probe] = (time.monotonic(), result)
+            else:
+                _PROBE_CACHE.pop(probe, None)
+            return result
+
+        cached.invalidate = lambda: _PROBE_CACHE.pop(probe, None)
+        return cached
+    return decorate
+
+@ttl_cache(GRAFANA_HEALTH_TTL)
 def grafana_health() -> Tuple[bool, str]:
     try:
         r = _get("/api/health", timeout=3)
-        if r.status_code != 200:
-            return False, f"HTTP {r.status_code}"
-        j = r.json()
+        if r.status != 200:
+            return False, f"HTTP {r.status}"
+        j = json_loads(r.data)
         return True, f"v{j.get('version','?')} db={j.get('database','?')}"
     except Exception as e:
         return False, str(e)
 
-def raise_for_status_with_body(r: requests.Response, ctx: str):
-    if 200 <= r.status_code < 300:
+def raise_for_status_with_body(r: urllib3.BaseHTTPResponse, ctx: str):
+    if 200 <= r.status < 300:
         return
     body = ""
     try:
-        body = r.text.strip()
+        body = r.data.decode("utf-8", "replace").strip()
     except Exception:
         body = "<no body>"
-    raise requests.HTTPError(f"{ctx}: HTTP {r.status_code} | {body}", response=r)
+    raise urllib3.exceptions.HTTPError(f"{ctx}: HTTP {r.status} | {body}")
 
 # -----------------------------------------------------------------------------
 # Loki via Grafana datasource proxy
@@ -76,12 +144,12 @@ def raise_for_status_with_body(r: requests.Response, ctx: str):
 def loki_api(path: str, params=None, timeout=10) -> dict:
     r = _get(f"/api/datasources/proxy/{DS_LOKI}{path}", params=params, timeout=timeout)
     raise_for_status_with_body(r, f"Loki {path}")
-    return r.json()
+    return json_loads(r.data)
 
 def loki_health() -> Tuple[bool, str]:
     try:
-        end_ns = int(time.time() * 1e9)
-        start_ns = int((time.time() - 60) * 1e9)
+        end_ns = time.time_ns()
+        start_ns = end_ns - 60 * 1_000_000_000
         loki_api(
             "/loki/api/v1/query_range",
             params={
@@ -97,9 +165,7 @@ def loki_health() -> Tuple[bool, str]:
     except Exception as e:
         return False, str(e)
 
-def loki_tail(query: str, limit: int, window_sec: int) -> List[dict]:
-    end_ns = int(time.time() * 1e9)
-    start_ns = int((time.time() - window_sec) * 1e9)
+def loki_tail(query: str, limit: int, start_ns: int, end_ns: int) -> List[dict]:
     j = loki_api(
         "/loki/api/v1/query_range",
         params={
@@ -113,38 +179,135 @@ def loki_tail(query: str, limit: int, window_sec: int) -> List[dict]:
     )
     return j.get("data", {}).get("result", []) or []
 
+def _stream_entries(labels: dict, values: List[list]) -> Iterator[Tuple[int, dict, str]]:
+    # Labels are looked up once per stream, not once per entry
+    return ((int(ts_ns), labels, line) for ts_ns, line in values)
+
+def top_entries(streams: List[dict], limit: int) -> List[Tuple[int, dict, str]]:
+    # Top-`limit` newest entries: O(N log limit) instead of sorting all N
+    entries = chain.from_iterable(
+        _stream_entries(s.get("stream") or {}, s.get("values") or []) for s in streams
+    )
+    return nlargest(limit, entries, key=itemgetter(0))
+
+# Newest-first rows currently held for _tail_query
+_tail_query: Optional[str] = None
+_tail_rows: List[Tuple[int, dict, str]] = []
+
+def tail_rows(query: str) -> List[Tuple[int, dict, str]]:
+    # Only the first frame (or a query switch) reads the whole window; later
+    # frames fetch lines newer than the newest held one and merge them in.
+    global _tail_query, _tail_rows
+    end_ns = time.time_ns()
+    window_start = end_ns - LOKI_WINDOW_SEC * 1_000_000_000
+    held = _tail_rows if query == _tail_query else []
+    start_ns = window_start
+    if held:
+        start_ns = max(window_start, held[0][0] - LOKI_OVERLAP_SEC * 1_000_000_000)
+
+    streams = loki_tail(query, LOKI_LIMIT, start_ns, end_ns)
+    seen = {(ts_ns, line) for ts_ns, _, line in held if ts_ns >= start_ns}
+    fresh = (e for e in top_entries(streams, LOKI_LIMIT) if (e[0], e[2]) not in seen)
+    kept = (e for e in held if e[0] >= window_start)
+
+    _tail_query = query
+    _tail_rows = nlargest(LOKI_LIMIT, chain(fresh, kept), key=itemgetter(0))
+    return _tail_rows
+
+def fetch_rows() -> Tuple[str, List[Tuple[int, dict, str]], Optional[str]]:
+    try:
+        return LOKI_QUERY, tail_rows(LOKI_QUERY), None
+    except Exception as e:
+        return LOKI_FALLBACK_QUERY, tail_rows(LOKI_FALLBACK_QUERY), str(e)
+
 # -----------------------------------------------------------------------------
 # Rendering helpers
 # -----------------------------------------------------------------------------
+_NL_TABLE = str.maketrans({"\n": "\\n", "\r": "\\r"})
+
 def truncate(s: str, n: int) -> str:
-    s = s.replace("\n", "\\n")
+    # Fast path: most cells are already short and single-line
+    if len(s) <= n and "\n" not in s and "\r" not in s:
+        return s
+    s = s.translate(_NL_TABLE)
     return s if len(s) <= n else s[: n - 1] + "…"
 
+# (epoch second, "HH:MM:SS") of the last formatted timestamp; rows arrive
+# newest-first, so neighbours usually share the second.
+_last_hms: Tuple[int, str] = (-1, "")
+
 def fmt_ts(ns: int) -> str:
-    return datetime.fromtimestamp(ns / 1e9).strftime("%H:%M:%S.%f")[:-3]
+    global _last_hms
+    sec, rem = divmod(ns, 1_000_000_000)
+    if sec != _last_hms[0]:
+        lt = time.localtime(sec)
+        _last_hms = (sec, f"{lt.tm_hour:02d}:{lt.tm_min:02d}:{lt.tm_sec:02d}")
+    return f"{_last_hms[1]}.{rem // 1_000_000:03d}"
+
+# Label pickers for the fixed ns/app/pod columns (first non-empty key wins)
+def pick_ns(labels: dict) -> str:
+    return labels.get("namespace") or "-"
+
+def pick_app(labels: dict) -> str:
+    return labels.get("app") or labels.get("service_name") or labels.get("container") or "-"
 
-def pick_label(labels: dict, *keys: str, default: str = "-") -> str:
-    for k in keys:
-        v = labels.get(k)
-        if v:
-            return v
-    return default
+def pick_pod(labels: dict) -> str:
+    return labels.get("pod") or "-"
+
+# -----------------------------------------------------------------------------
+# Parsed request fields, as produced by the parsers below
+# -----------------------------------------------------------------------------
+class ParsedRow(NamedTuple):
+    method: str
+    path: str
+    status: str
+    upstream: str
+    req_id: str
+    authority: str = "-"
+    dur: Optional[str] = None  # only known for nginx-ish access lines
+
+# -----------------------------------------------------------------------------
+# 0) Fields already extracted by Loki (LogQL `| json` stage)
+# -----------------------------------------------------------------------------
+def parse_labels(labels: dict) -> Optional[ParsedRow]:
+    method = labels.get("method")
+    path = labels.get("path")
+    status = labels.get("status")
+    if not (method and path and status):
+        return None
+
+    return ParsedRow(
+        method=method,
+        path=path,
+        status=status,
+        upstream=labels.get("upstream") or "-",
+        req_id=labels.get("req_id") or labels.get("request_id") or "-",
+        authority=labels.get("authority") or "-",
+    )
 
 # -----------------------------------------------------------------------------
 # 1) Parse Envoy structured JSON logs
 # -----------------------------------------------------------------------------
-def parse_envoy_json(line: str) -> Optional[dict]:
+def parse_envoy_json(line: str) -> Optional[ParsedRow]:
     line = line.strip()
     if not (line.startswith("{") and line.endswith("}")):
         return None
+    # Cheap substring check before paying for a full JSON parse
+    if '"authority"' not in line:
+        return None
     try:
-        obj = json.loads(line)
+        obj = json_loads(line)
     except Exception:
         return None
 
     # We only treat it as envoy access JSON if it looks like one
-    needed = {"authority", "method", "path", "status", "upstream"}
-    if not needed.issubset(obj.keys()):
+    if not (
+        "authority" in obj
+        and "method" in obj
+        and "path" in obj
+        and "status" in obj
+        and "upstream" in obj
+    ):
         return None
 
     # Normalize / safe casts
@@ -154,207 +317,274 @@ def parse_envoy_json(line: str) -> Optional[dict]:
     except Exception:
         status = status
 
-    return {
-        "authority": str(obj.get("authority", "-")),
-        "method": str(obj.get("method", "-")),
-        "path": str(obj.get("path", "-")),
-        "status": status,
-        "upstream": str(obj.get("upstream", "-")),
-        "req_id": str(obj.get("req_id", obj.get("request_id", "-"))),
-        "ts": str(obj.get("ts", "-")),
-    }
+    return ParsedRow(
+        method=str(obj["method"]),
+        path=str(obj["path"]),
+        status=str(status),
+        upstream=str(obj["upstream"]),
+        req_id=str(obj.get("req_id", obj.get("request_id", "-"))),
+        authority=str(obj["authority"]),
+    )
 
 # -----------------------------------------------------------------------------
 # 2) Parse nginx-ish access log lines (your other envoy format)
 # -----------------------------------------------------------------------------
-ACCESS_RE = re.compile(r'"(?P<method>[A-Z]+)\s+(?P<path>\S+)\s+HTTP/[^"]+"\s+(?P<status>\d{3})\s')
+ACCESS_RE = re.compile(
+    r'"(?P<method>[A-Z]+)\s+(?P<path>\S+)\s+HTTP/[^"]+"\s+(?P<status>\d{3})\s', re.ASCII
+)
+# One scan over the whitespace-delimited tokens for all tail heuristics:
+#   up:  first token that looks like IP:port
+#   dur: first token that looks like 0.002
+#   rid: the last token, if it is a 32-hex request id
+TAIL_RE = re.compile(
+    r"(?<!\S)(?:(?P<up>\S*\.\S*:\d+)|(?P<dur>\d+\.\d*|\.\d+)|(?P<rid>[0-9a-f]{32}))(?!\S)",
+    re.ASCII,
+)
 
-def parse_access_line(line: str) -> Optional[dict]:
+def parse_access_line(line: str) -> Optional[ParsedRow]:
     m = ACCESS_RE.search(line)
     if not m:
         return None
 
     method = m.group("method")
     path = m.group("path")
-    status = int(m.group("status"))
+    status = m.group("status")
 
-    # heuristic for req_id: last token often 32-hex
-    tokens = line.strip().split()
-    req_id = "-"
-    if tokens:
-        last = tokens[-1]
-        if re.fullmatch(r"[0-9a-f]{32}", last):
-            req_id = last
-
-    # heuristic for upstream: first token that looks like IP:port
     upstream = "-"
-    for tok in tokens:
-        if ":" in tok and tok.count(".") >= 1 and tok.split(":")[-1].isdigit():
-            upstream = tok
-            break
-
-    # heuristic duration: first token that looks like 0.002
     dur = "-"
-    for tok in tokens:
-        if tok.count(".") == 1 and tok.replace(".", "").isdigit():
-            dur = tok
-            break
-
-    return {
-        "method": method,
-        "path": path,
-        "status": status,
-        "upstream": upstream,
-        "dur": dur,
-        "req_id": req_id,
-    }
+    req_id = "-"
+    end = len(line.rstrip())
+    for t in TAIL_RE.finditer(line):
+        kind = t.lastgroup
+        if kind == "up":
+            if upstream == "-":
+                upstream = t.group()
+        elif kind == "dur":
+            if dur == "-":
+                dur = t.group()
+        elif t.end() == end:
+            req_id = t.group()
+
+    return ParsedRow(
+        method=method,
+        path=path,
+        status=status,
+        upstream=upstream,
+        req_id=req_id,
+        dur=dur,  # authority unknown in this format
+    )
 
 # -----------------------------------------------------------------------------
 # Render table
 # -----------------------------------------------------------------------------
-def render_loki_table(active_query: str, streams: List[dict], limit: int) -> Table:
-    t = Table(title=f"Loki | {active_query}", show_lines=False)
-
-    t.add_column("time", width=12)
-    t.add_column("ns", width=12, overflow="fold")
-    t.add_column("app", width=8, overflow="fold")
-    t.add_column("pod", width=MAX_POD_LEN, overflow="fold")
+# (ts_ns, line) -> rendered request cells (everything but ns/app/pod);
+# LRU-bounded so the rows still on screen are never evicted.
+ROW_CACHE: "OrderedDict[Tuple[int, str], Tuple[str, ...]]" = OrderedDict()
+ROW_CACHE_MAX = 2 * LOKI_LIMIT
+
+# (header, add_column kwargs); fixed at import, replayed onto each frame's table
+LOKI_COLUMNS: Tuple[Tuple[str, dict], ...] = (
+    ("time", {"width": 12}),
+    ("ns", {"width": 12, "overflow": "fold"}),
+    ("app", {"width": 8, "overflow": "fold"}),
+    ("pod", {"width": MAX_POD_LEN, "overflow": "fold"}),
 
     # Structured request columns
-    t.add_column("st", width=3, justify="right")
-    t.add_column("auth", width=16, overflow="fold")
-    t.add_column("m", width=4)
-    t.add_column("path", width=MAX_PATH_LEN, overflow="fold")
-    t.add_column("up", width=MAX_UPSTREAM_LEN, overflow="fold")
-    t.add_column("req_id", width=12, overflow="fold")
+    ("st", {"width": 3, "justify": "right"}),
+    ("auth", {"width": 16, "overflow": "fold"}),
+    ("m", {"width": 4}),
+    ("path", {"width": MAX_PATH_LEN, "overflow": "fold"}),
+    ("up", {"width": MAX_UPSTREAM_LEN, "overflow": "fold"}),
+    ("req_id", {"width": 12, "overflow": "fold"}),
 
     # Fallback msg
-    t.add_column("msg", overflow="fold")
+    ("msg", {"overflow": "fold"}),
+)
 
-    rows: List[Tuple[int, dict, str]] = []
-    for s in streams:
-        labels = s.get("stream", {}) or {}
-        for ts_ns, line in s.get("values", []):
-            rows.append((int(ts_ns), labels, line))
+def line_cells(ts_ns: int, labels: dict, line: str) -> Tuple[str, ...]:
+    # Prefer fields Loki already extracted, then envoy JSON access logs,
+    # then nginx-ish access lines
+    row = parse_labels(labels) or parse_envoy_json(line) or parse_access_line(line)
+    if row:
+        return (
+            fmt_ts(ts_ns),
+            row.status,
+            truncate(row.authority, 16),
+            row.method,
+            truncate(row.path, MAX_PATH_LEN),
+            truncate(row.upstream, MAX_UPSTREAM_LEN),
+            truncate(row.req_id, 12),
+            # msg empty when we have structure; access lines carry a duration
+            "" if row.dur is None else f"dur={row.dur}",
+        )
 
-    rows.sort(key=lambda x: x[0], reverse=True)
+    # Raw fallback
+    return (
+        fmt_ts(ts_ns),
+        "-",
+        "-",
+        "-",
+        "-",
+        "-",
+        "-",
+        truncate(line.rstrip(), MAX_MSG_LEN),
+    )
+
+def render_loki_table(active_query: str, rows: List[Tuple[int, dict, str]]) -> Table:
+    t = Table(title=f"Loki | {active_query}", show_lines=False)
+
+    for header, opts in LOKI_COLUMNS:
+        t.add_column(header, **opts)
 
     if not rows:
         t.add_row("-", "-", "-", "-", "-", "-", "-", "-", "-", "-", "-", "(no logs in window)")
         return t
 
-    for ts_ns, labels, line in rows[:limit]:
-        ns = pick_label(labels, "namespace")
-        app = pick_label(labels, "app", "service_name", "container")
-        pod = truncate(pick_label(labels, "pod"), MAX_POD_LEN)
-
-        # Prefer envoy JSON access logs (best structured)
-        ej = parse_envoy_json(line)
-        if ej:
-            t.add_row(
-                fmt_ts(ts_ns),
-                ns,
-                app,
-                pod,
-                str(ej["status"]),
-                truncate(ej["authority"], 16),
-                ej["method"],
-                truncate(ej["path"], MAX_PATH_LEN),
-                truncate(ej["upstream"], MAX_UPSTREAM_LEN),
-                truncate(ej["req_id"], 12),
-                "",  # msg empty, we have structure
-            )
-            continue
-
-        # Next: nginx-ish access log
-        al = parse_access_line(line)
-        if al:
-            t.add_row(
-                fmt_ts(ts_ns),
-                ns,
-                app,
-                pod,
-                str(al["status"]),
-                "-",  # authority unknown in this format
-                al["method"],
-                truncate(al["path"], MAX_PATH_LEN),
-                truncate(al["upstream"], MAX_UPSTREAM_LEN),
-                truncate(al["req_id"], 12),
-                f"dur={al['dur']}",
-            )
-            continue
-
-        # Raw fallback
-        t.add_row(
-            fmt_ts(ts_ns),
-            ns,
-            app,
-            pod,
-            "-",
-            "-",
-            "-",
-            "-",
-            "-",
-            "-",
-            truncate(line.rstrip(), MAX_MSG_LEN),
-        )
+    for ts_ns, labels, line in rows:
+        ns = pick_ns(labels)
+        app = pick_app(labels)
+        pod = truncate(pick_pod(labels), MAX_POD_LEN)
+
+        # Consecutive frames mostly show the same lines; only parse new ones
+        key = (ts_ns, line)
+        cells = ROW_CACHE.get(key)
+        if cells is None:
+            cells = line_cells(ts_ns, labels, line)
+            ROW_CACHE[key] = cells
+            if len(ROW_CACHE) > ROW_CACHE_MAX:
+                ROW_CACHE.popitem(last=False)
+        else:
+            ROW_CACHE.move_to_end(key)
+
+        t.add_row(cells[0], ns, app, pod, *cells[1:])
 
     return t
 
-def build_layout(banner: Panel, table: Table) -> Layout:
+def build_layout() -> Layout:
+    # Fixed skeleton, built once; frames only swap the named parts' contents
     layout = Layout()
     layout.split_column(
-        Layout(banner, size=7),
-        Layout(table),
+        Layout(name="banner", size=7),
+        Layout(name="table"),
     )
     return layout
 
 # -----------------------------------------------------------------------------
 # Main loop
 # -----------------------------------------------------------------------------
-def main():
-    last_loki_error: Optional[str] = None
-    active_query = LOKI_QUERY
+def wait_for_resize(wake_fd: Optional[int], timeout: float) -> bool:
+    # Block up to `timeout` seconds; True if SIGWINCH arrived meanwhile.
+    # The wakeup bytes are drained so the next wait blocks again.
+    if timeout <= 0:
+        return False
+    if wake_fd is None:
+        time.sleep(timeout)
+        return False
+    if not select.select([wake_fd], [], [], timeout)[0]:
+        return False
+    try:
+        while os.read(wake_fd, 512):
+            pass
+    except BlockingIOError:
+        pass
+    return True
 
-    with Live(console=console, refresh_per_second=10, screen=True) as live:
+def main():
+    # A successful tail through the datasource proxy already proves Loki is
+    # alive, so the dedicated Loki probe only runs on the first frame and after
+    # repeated tail failures, and each of those runs asks Loki afresh. The
+    # Grafana probe is cached for GRAFANA_HEALTH_TTL and re-probed right away
+    # after a failed tail.
+    # Whatever runs in a frame runs concurrently, and a slow probe never holds
+    # up the frame for more than PROBE_WAIT.
+    g_ok, g_msg = False, "not probed"
+    l_ok, l_msg = False, "not probed"
+    f_grafana: Optional[Future] = None
+    f_loki: Optional[Future] = None
+    tail_failures = 0
+    first = True
+
+    # Nothing is repainted unless the frame's data changed or the terminal
+    # was resized; SIGWINCH wakes the inter-frame wait to redraw right away.
+    # The handler itself does nothing: signal.set_wakeup_fd has the
+    # interpreter write to a pipe the wait selects on, so no lock is ever
+    # taken in signal context.
+    prev_digest = None
+    wake_r: Optional[int] = None
+    if hasattr(signal, "SIGWINCH"):
+        wake_r, wake_w = os.pipe()
+        os.set_blocking(wake_r, False)
+        os.set_blocking(wake_w, False)
+        signal.set_wakeup_fd(wake_w)
+        signal.signal(signal.SIGWINCH, lambda signum, frame: None)
+
+    layout = build_layout()
+
+    with ThreadPoolExecutor(max_workers=3) as pool, \
+            Live(layout, console=console, auto_refresh=False, screen=True) as live:
         while True:
-            g_ok, g_msg = grafana_health()
-            l_ok, l_msg = loki_health()
-
-            header = Text()
-            header.append("tui.py ", style="bold")
-            header.append(
-                f"refresh={REFRESH}s  window={LOKI_WINDOW_SEC}s  limit={LOKI_LIMIT}  ",
-                style="dim",
-            )
-            header.append("| ")
+            # Only one probe of each kind in flight at a time
+            if f_grafana is None:
+                if tail_failures:
+                    grafana_health.invalidate()
+                f_grafana = pool.submit(grafana_health)
+            if f_loki is None and (first or tail_failures >= LOKI_PROBE_AFTER):
+                f_loki = pool.submit(loki_health)
+            f_rows = pool.submit(fetch_rows)
 
-            header.append("Grafana=", style="bold")
-            header.append("OK " if g_ok else "FAIL ", style="green" if g_ok else "red")
-            header.append(f"({g_msg})  ")
-
-            header.append("Loki=", style="bold")
-            header.append("OK " if l_ok else "FAIL ", style="green" if l_ok else "red")
-            header.append(f"({l_msg})")
+            try:
+                active_query, rows, last_loki_error = f_rows.result()
+            except Exception as e:
+                active_query, rows, last_loki_error = LOKI_QUERY, [], str(e)
 
             if last_loki_error:
-                header.append("\n")
-                header.append(f"Loki tail error: {last_loki_error}", style="yellow")
-
-            banner = Panel(header, title="Status", border_style="blue")
+                tail_failures += 1
+                l_ok, l_msg = False, last_loki_error
+            else:
+                tail_failures = 0
+                l_ok, l_msg = True, "query ok"
 
             try:
-                streams = loki_tail(LOKI_QUERY, LOKI_LIMIT, LOKI_WINDOW_SEC)
-                active_query = LOKI_QUERY
-                last_loki_error = None
-            except Exception as e:
-                last_loki_error = str(e)
-                streams = loki_tail(LOKI_FALLBACK_QUERY, LOKI_LIMIT, LOKI_WINDOW_SEC)
-                active_query = LOKI_FALLBACK_QUERY
-
-            table = render_loki_table(active_query, streams, LOKI_LIMIT)
-            live.update(build_layout(banner, table))
-            time.sleep(REFRESH)
+                g_ok, g_msg = f_grafana.result(timeout=PROBE_WAIT)
+                f_grafana = None
+            except FutureTimeout:
+                g_msg = "probe pending"
+            if f_loki:
+                try:
+                    l_ok, l_msg = f_loki.result(timeout=PROBE_WAIT)
+                    f_loki = None
+                except FutureTimeout:
+                    pass
+            first = False
+
+            digest = hash((
+                g_ok, g_msg, l_ok, l_msg, last_loki_error, active_query,
+                tuple((ts_ns, line) for ts_ns, _, line in rows),
+            ))
+            if digest != prev_digest:
+                prev_digest = digest
+                header = Text.assemble(
+                    ("tui.py ", "bold"),
+                    (f"refresh={REFRESH}s  window={LOKI_WINDOW_SEC}s  limit={LOKI_LIMIT}  ", "dim"),
+                    "| ",
+                    ("Grafana=", "bold"),
+                    ("OK ", "green") if g_ok else ("FAIL ", "red"),
+                    f"({g_msg})  ",
+                    ("Loki=", "bold"),
+                    ("OK ", "green") if l_ok else ("FAIL ", "red"),
+                    f"({l_msg})",
+                )
+                if last_loki_error:
+                    header.append(f"\nLoki tail error: {last_loki_error}", style="yellow")
+
+                layout["banner"].update(Panel(header, title="Status", border_style="blue"))
+                layout["table"].update(render_loki_table(active_query, rows))
+                live.refresh()
+
+            # Sleep until the next frame, repainting as-is on resize
+            deadline = time.monotonic() + REFRESH
+            while wait_for_resize(wake_r, deadline - time.monotonic()):
+                live.refresh()
 
 if __name__ == "__main__":
     main()
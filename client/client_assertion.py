@@ -7,44 +7,11 @@ Prints the JWT to stdout so it can be captured in shell:
 """
 
 import argparse
-import base64
-import json
+import secrets
+import sys
 import time
-import uuid
-import urllib.request
 
-
-def b64url(data: bytes) -> str:
-    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
-
-
-def get_token_endpoint(ingress_base: str, realm: str) -> str:
-    url = f"{ingress_base}/realms/{realm}/.well-known/openid-configuration"
-    req = urllib.request.Request(url, method="GET")
-    req.add_header("Host", "keycloak.local")
-
-    with urllib.request.urlopen(req, timeout=10) as resp:
-        raw = resp.read().decode("utf-8")
-        doc = json.loads(raw)
-        return doc["token_endpoint"]
-
-
-def sign_rs256_with_openssl(message: bytes, private_key_path: str) -> bytes:
-    import subprocess
-
-    try:
-        p = subprocess.run(
-            ["openssl", "dgst", "-sha256", "-sign", private_key_path],
-            input=message,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            check=True,
-        )
-        return p.stdout
-    except FileNotFoundError:
-        raise RuntimeError("openssl not found. Install it or put it on PATH.")
-    except subprocess.CalledProcessError as e:
-        raise RuntimeError(f"openssl signing failed: {e.stderr.decode('utf-8', 'ignore')}")
+from oidc_common import b64url_bytes, b64url_json, get_token_endpoint, jwt_header_b64, sign_rs256
 
 
 def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
@@ -91,10 +58,7 @@ def main(argv: list[str] | None = None) -> int:
     token_endpoint = get_token_endpoint(args.ingress_base, args.realm)
     now = int(time.time())
 
-    header = {"alg": "RS256", "typ": "JWT"}
     kid = args.kid.strip() if isinstance(args.kid, str) and args.kid.strip() else None
-    if kid:
-        header["kid"] = kid
 
     payload = {
         "iss": args.client_id,
@@ -102,17 +66,19 @@ def main(argv: list[str] | None = None) -> int:
         "aud": token_endpoint,
         "iat": now,
         "exp": now + args.lifetime_sec,
-        "jti": str(uuid.uuid4()),
+        "jti": secrets.token_urlsafe(16),
     }
 
-    signing_input = (
-        f"{b64url(json.dumps(header, separators=(',', ':')).encode())}."
-        f"{b64url(json.dumps(payload, separators=(',', ':')).encode())}"
-    ).encode("ascii")
+    # header.payload is the signing input; the signature is appended in place
+    jwt = bytearray(jwt_header_b64(kid))
+    jwt += b"."
+    jwt += b64url_json(payload)
 
-    sig = sign_rs256_with_openssl(signing_input, args.private_key)
-    jwt = signing_input.decode("ascii") + "." + b64url(sig)
-    print(jwt)
+    sig = sign_rs256(bytes(jwt), args.private_key)
+    jwt += b"."
+    jwt += b64url_bytes(sig)
+    jwt += b"\n"
+    sys.stdout.buffer.write(jwt)
     return 0
 
 
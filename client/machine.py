@@ -13,13 +13,15 @@ No external deps, stdlib only.
 import argparse
 import base64
 import json
+import os
 import sys
 import time
 import urllib.parse
-import urllib.request
 from urllib.error import HTTPError, URLError
 from enum import Enum
 
+from oidc_common import http_request, raise_for_status
+
 
 DEBUG = False
 
@@ -53,8 +55,9 @@ def debug(msg: str):
 def decode_jwt_payload(token: str) -> dict:
     """Decode JWT payload WITHOUT verification (debug only)."""
     try:
-        payload_b64 = token.split(".")[1]
-        payload_b64 += "=" * (-len(payload_b64) % 4)
+        _, _, rest = token.partition(".")
+        payload_b64, _, _ = rest.partition(".")
+        payload_b64 += "=" * (-len(payload_b64) & 3)
         raw = base64.urlsafe_b64decode(payload_b64.encode())
         return json.loads(raw.decode())
     except Exception as e:
@@ -63,37 +66,35 @@ def decode_jwt_payload(token: str) -> dict:
 
 def post_form(url: str, data: dict, host: str, timeout: int = 10) -> dict:
     body = urllib.parse.urlencode(data).encode("utf-8")
-    req = urllib.request.Request(url, data=body, method="POST")
-    req.add_header("Host", host)
-    req.add_header("Content-Type", "application/x-www-form-urlencoded")
+    headers = {"Host": host, "Content-Type": "application/x-www-form-urlencoded"}
 
-    debug(f"POST {url}")
-    debug(f"Host: {host}")
-    debug(f"Form data: {data}")
+    if DEBUG:
+        debug(f"POST {url}")
+        debug(f"Host: {host}")
+        debug(f"Form data: {data}")
 
-    with urllib.request.urlopen(req, timeout=timeout) as resp:
-        raw = resp.read().decode("utf-8")
-        debug(f"Token response ({resp.status}): {raw[:200]}...")
-        return json.loads(raw)
+    resp, raw = http_request("POST", url, body=body, headers=headers, timeout=timeout)
+    raise_for_status(url, resp, raw)
+    if DEBUG:
+        debug(f"Token response ({resp.status}): {raw[:200].decode('utf-8', 'replace')}...")
+    return json.loads(raw)
 
 
 def post_json(url: str, payload: dict, host: str, bearer: str, timeout: int = 10):
     body = json.dumps(payload).encode("utf-8")
-    req = urllib.request.Request(url, data=body, method="POST")
-    req.add_header("Host", host)
-    req.add_header("Content-Type", "application/json")
-    req.add_header("Authorization", f"Bearer {bearer}")
+    headers = {
+        "Host": host,
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {bearer}",
+    }
 
-    debug(f"POST {url}")
-    debug(f"Host: {host}")
-    debug(f"Payload: {payload}")
+    if DEBUG:
+        debug(f"POST {url}")
+        debug(f"Host: {host}")
+        debug(f"Payload: {payload}")
 
-    try:
-        with urllib.request.urlopen(req, timeout=timeout) as resp:
-            raw = resp.read().decode("utf-8")
-            return resp.status, raw
-    except HTTPError as e:
-        return e.code, e.read().decode("utf-8")
+    resp, raw = http_request("POST", url, body=body, headers=headers, timeout=timeout)
+    return resp.status, raw.decode("utf-8")
 
 
 def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
@@ -120,8 +121,9 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     )
     parser.add_argument(
         "--password",
-        required=True,
-        help="Keycloak password.",
+        default=os.getenv("KC_PASS"),
+        required=not os.getenv("KC_PASS"),
+        help="Keycloak password (default: $KC_PASS).",
     )
     parser.add_argument(
         "--machine-id",
@@ -184,24 +186,27 @@ def main(argv: list[str] | None = None) -> int:
     access_token = token_resp.get("access_token")
     if not access_token:
         log("No access_token returned", LogLevel.ERROR)
-        debug(json.dumps(token_resp, indent=2))
+        if DEBUG:
+            debug(json.dumps(token_resp, indent=2))
         return 4
 
     log("Access token received", LogLevel.SUCCESS)
 
-    claims = decode_jwt_payload(access_token)
-    debug("Decoded JWT claims:")
-    debug(json.dumps(
-        {k: claims.get(k) for k in ("iss", "aud", "azp", "sub", "exp")},
-        indent=2
-    ))
+    if DEBUG:
+        claims = decode_jwt_payload(access_token)
+        debug("Decoded JWT claims:")
+        debug(json.dumps(
+            {k: claims.get(k) for k in ("iss", "aud", "azp", "sub", "exp")},
+            indent=2
+        ))
 
     # ---- 2) Call hello ----
+    now = int(time.time())
     payload = {
         "machineId": machine_id,
-        "spinId": f"spin-{int(time.time())}",
+        "spinId": f"spin-{now}",
         "bet": bet,
-        "ts": int(time.time()),
+        "ts": now,
     }
 
     log("Calling protected API via Envoy")
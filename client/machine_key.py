@@ -8,7 +8,7 @@ Flow:
 3) Decode and print selected JWT claims (debug only, no verification)
 4) Call POST /hello through Envoy with Bearer token
 
-No external deps, stdlib only.
+No external deps, stdlib only (`cryptography` is used for signing if installed).
 
 Prereqs (Keycloak):
 - Client "slot-machine"
@@ -25,20 +25,37 @@ Networking model (your setup):
 """
 
 import base64
+import functools
 import json
+import secrets
 import sys
 import time
-import uuid
 import urllib.parse
-import urllib.request
 from urllib.error import HTTPError, URLError
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
 import datetime
 
+from oidc_common import (
+    b64url_bytes,
+    b64url_json,
+    compact_json,
+    get_token_endpoint,
+    http_request,
+    jwt_header_b64,
+    preload_private_key,
+    raise_for_status,
+    sign_rs256,
+)
+
 
 DEBUG = False
 
+# Seconds before `exp` at which the loop fetches a fresh access token
+# (capped at half the token lifetime for very short-lived tokens)
+TOKEN_REFRESH_SKEW = 30
+
 
 class LogLevel(Enum):
     DEBUG = "debug"
@@ -66,93 +83,59 @@ def debug(msg: str):
         log(msg, LogLevel.DEBUG)
 
 
-def b64url(data: bytes) -> str:
-    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
-
-
 def decode_jwt_payload(token: str) -> dict:
     """Decode JWT payload WITHOUT verification (debug only)."""
     try:
-        payload_b64 = token.split(".")[1]
-        payload_b64 += "=" * (-len(payload_b64) % 4)
+        _, _, rest = token.partition(".")
+        payload_b64, _, _ = rest.partition(".")
+        payload_b64 += "=" * (-len(payload_b64) & 3)
         raw = base64.urlsafe_b64decode(payload_b64.encode())
         return json.loads(raw.decode())
     except Exception as e:
         return {"error": str(e)}
-    
-def get_token_endpoint(ingress_base: str, realm: str) -> str:
-    url = f"{ingress_base}/realms/{realm}/.well-known/openid-configuration"
-    req = urllib.request.Request(url, method="GET")
-    req.add_header("Host", "keycloak.local")
-
-    with urllib.request.urlopen(req, timeout=10) as resp:
-        raw = resp.read().decode("utf-8")
-        doc = json.loads(raw)
-        return doc["token_endpoint"]
-
-
-def post_form(url: str, data: dict, host: str, timeout: int = 10) -> dict:
-    body = urllib.parse.urlencode(data).encode("utf-8")
-    req = urllib.request.Request(url, data=body, method="POST")
-    req.add_header("Host", host)
-    req.add_header("Content-Type", "application/x-www-form-urlencoded")
-
-    debug(f"POST {url}")
-    debug(f"Host: {host}")
-    debug(f"Form data keys: {list(data.keys())}")
-
-    with urllib.request.urlopen(req, timeout=timeout) as resp:
-        raw = resp.read().decode("utf-8")
-        debug(f"Token response ({resp.status}): {raw[:200]}...")
-        return json.loads(raw)
 
 
-def post_json(url: str, payload: dict, host: str, bearer: str, timeout: int = 10):
-    body = json.dumps(payload).encode("utf-8")
-    req = urllib.request.Request(url, data=body, method="POST")
-    req.add_header("Host", host)
-    req.add_header("Content-Type", "application/json")
-    req.add_header("Authorization", f"Bearer {bearer}")
+def post_form(url: str, data: dict | bytes, host: str, timeout: int = 10) -> dict:
+    """POST a form; `data` is a dict to urlencode or an already-encoded body."""
+    body = data if isinstance(data, bytes) else urllib.parse.urlencode(data).encode("utf-8")
+    headers = {"Host": host, "Content-Type": "application/x-www-form-urlencoded"}
 
-    debug(f"POST {url}")
-    debug(f"Host: {host}")
-    debug(f"Payload: {payload}")
-
-    try:
-        with urllib.request.urlopen(req, timeout=timeout) as resp:
-            raw = resp.read().decode("utf-8")
-            return resp.status, raw
-    except HTTPError as e:
-        return e.code, e.read().decode("utf-8")
+    if DEBUG:
+        keys = [field.partition(b"=")[0].decode() for field in body.split(b"&")]
+        debug(f"POST {url}")
+        debug(f"Host: {host}")
+        debug(f"Form data keys: {keys}")
 
+    resp, raw = http_request("POST", url, body=body, headers=headers, timeout=timeout)
+    raise_for_status(url, resp, raw)
+    if DEBUG:
+        debug(f"Token response ({resp.status}): {raw[:200].decode('utf-8', 'replace')}...")
+    return json.loads(raw)
+
+
+# The hello loop sends the same host/token pair until the token is refreshed,
+# so the header dict is built once per token. Callers must not mutate it.
+@functools.lru_cache(maxsize=2)
+def json_headers(host: str, bearer: str) -> dict:
+    return {
+        "Host": host,
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {bearer}",
+    }
 
-# ---------- Minimal RS256 signing (stdlib only) ----------
-# Python stdlib has no RSA signer. We shell out to openssl (available on macOS / most dev boxes).
-# This keeps the script dependency-free while still being reproducible.
 
-def sign_rs256_with_openssl(message: bytes, private_key_path: str) -> bytes:
-    """
-    Returns RSA PKCS#1 v1.5 + SHA-256 signature of `message`.
-    Requires `openssl` in PATH.
+def post_json(url: str, payload: dict | bytes, host: str, bearer: str, timeout: int = 10):
+    """POST JSON; `payload` is a dict to serialize or an already-encoded body."""
+    body = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+    headers = json_headers(host, bearer)
 
-    Equivalent to:
-      openssl dgst -sha256 -sign key.pem
-    """
-    import subprocess
+    if DEBUG:
+        debug(f"POST {url}")
+        debug(f"Host: {host}")
+        debug(f"Payload: {body.decode('utf-8')}")
 
-    try:
-        p = subprocess.run(
-            ["openssl", "dgst", "-sha256", "-sign", private_key_path],
-            input=message,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            check=True,
-        )
-        return p.stdout
-    except FileNotFoundError:
-        raise RuntimeError("openssl not found. Install it or put it on PATH.")
-    except subprocess.CalledProcessError as e:
-        raise RuntimeError(f"openssl signing failed: {e.stderr.decode('utf-8', 'ignore')}")
+    resp, raw = http_request("POST", url, body=body, headers=headers, timeout=timeout)
+    return resp.status, raw.decode("utf-8")
 
 
 def build_client_assertion_rs256(
@@ -161,6 +144,7 @@ def build_client_assertion_rs256(
     private_key_path: str,
     kid: str | None = None,
     lifetime_sec: int = 300,
+    now: int | None = None,
 ) -> str:
     """
     Build a JWT suitable for Keycloak private_key_jwt authentication.
@@ -168,31 +152,29 @@ def build_client_assertion_rs256(
     Claims:
       iss, sub = client_id
       aud      = token endpoint URL
-      iat/exp  = now / now+lifetime
+      iat/exp  = now / now+lifetime  (now defaults to the current time)
       jti      = random id
     """
-    now = int(time.time())
-    header = {"alg": "RS256", "typ": "JWT"}
-    if kid:
-        header["kid"] = kid
-
+    if now is None:
+        now = int(time.time())
     payload = {
         "iss": client_id,
         "sub": client_id,
         "aud": token_endpoint_aud,
         "iat": now,
         "exp": now + lifetime_sec,
-        "jti": str(uuid.uuid4()),
+        "jti": secrets.token_urlsafe(16),
     }
 
-    signing_input = f"{b64url(json.dumps(header, separators=(',', ':')).encode())}.{b64url(json.dumps(payload, separators=(',', ':')).encode())}".encode("ascii")
-    sig = sign_rs256_with_openssl(signing_input, private_key_path)
-    jwt = signing_input.decode("ascii") + "." + b64url(sig)
+    signing_input = jwt_header_b64(kid) + b"." + b64url_json(payload)
+    sig = sign_rs256(signing_input, private_key_path)
+    jwt = (signing_input + b"." + b64url_bytes(sig)).decode("ascii")
 
-    debug("Built client_assertion:")
-    debug(f"  aud: {token_endpoint_aud}")
-    debug(f"  iss/sub: {client_id}")
-    debug(f"  kid: {kid or '<none>'}")
+    if DEBUG:
+        debug("Built client_assertion:")
+        debug(f"  aud: {token_endpoint_aud}")
+        debug(f"  iss/sub: {client_id}")
+        debug(f"  kid: {kid or '<none>'}")
     return jwt
 
 
@@ -256,6 +238,20 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     return parser.parse_args(argv)
 
 
+@functools.lru_cache(maxsize=4)
+def assertion_form_prefix(client_id: str) -> bytes:
+    """
+    Constant head of the client_credentials + private_key_jwt token request
+    body, ending in `client_assertion=`. A JWT is only base64url segments and
+    dots, which urlencode leaves as-is, so the assertion is appended raw.
+    """
+    return urllib.parse.urlencode({
+        "grant_type": "client_credentials",
+        "client_id": client_id,
+        "client_assertion_type": "urn:ietf:params:oauth:client-assertion-type:jwt-bearer",
+    }).encode("ascii") + b"&client_assertion="
+
+
 def fetch_access_token(
     *,
     token_url: str,
@@ -265,6 +261,9 @@ def fetch_access_token(
     kid: str | None,
     token_max_age: int,
 ) -> tuple[str, int]:
+    # One clock read for iat and for the expiry estimate; taken before the
+    # request, so the estimate errs on the early side
+    now = int(time.time())
     try:
         client_assertion = build_client_assertion_rs256(
             client_id=client_id,
@@ -272,6 +271,7 @@ def fetch_access_token(
             private_key_path=key_path,
             kid=kid,
             lifetime_sec=token_max_age,
+            now=now,
         )
     except Exception as e:
         raise RuntimeError(f"Failed to build client_assertion: {e}")
@@ -280,35 +280,31 @@ def fetch_access_token(
 
     token_resp = post_form(
         token_url,
-        {
-            "grant_type": "client_credentials",
-            "client_id": client_id,
-            "client_assertion_type": "urn:ietf:params:oauth:client-assertion-type:jwt-bearer",
-            "client_assertion": client_assertion,
-        },
+        assertion_form_prefix(client_id) + client_assertion.encode("ascii"),
         host="keycloak.local",
     )
 
     access_token = token_resp.get("access_token")
     if not access_token:
-        debug(json.dumps(token_resp, indent=2))
+        if DEBUG:
+            debug(json.dumps(token_resp, indent=2))
         raise RuntimeError("No access_token returned")
 
-    now = int(time.time())
+    claims = decode_jwt_payload(access_token)
     expires_in = token_resp.get("expires_in")
     if isinstance(expires_in, int) and expires_in > 0:
         exp = now + min(expires_in, token_max_age)
     else:
-        claims = decode_jwt_payload(access_token)
         exp = int(claims.get("exp") or 0)
         if not exp:
             exp = now + token_max_age
 
-    claims = decode_jwt_payload(access_token)
-    debug("Decoded JWT claims:")
-    debug(json.dumps({k: claims.get(k) for k in ("iss", "aud", "azp", "sub", "exp")}, indent=2))
+    if DEBUG:
+        debug("Decoded JWT claims:")
+        debug(json.dumps({k: claims.get(k) for k in ("iss", "aud", "azp", "sub", "exp")}, indent=2))
     if isinstance(claims.get("exp"), int):
-        exp_utc = datetime.datetime.utcfromtimestamp(claims["exp"]).isoformat() + "Z"
+        exp_utc = datetime.datetime.fromtimestamp(claims["exp"], tz=datetime.timezone.utc)
+        exp_utc = exp_utc.isoformat().replace("+00:00", "Z")
         log(f"Access token exp (UTC): {exp_utc}")
 
     return access_token, exp
@@ -331,7 +327,11 @@ def main(argv: list[str] | None = None) -> int:
     token_max_age = args.token_max_age
 
     token_url = f"{ingress_base}/realms/{realm}/protocol/openid-connect/token"
-    token_aud = get_token_endpoint(ingress_base, realm)
+    # Discovery is a network round trip and key loading is local work;
+    # neither needs the other, so the key is parsed while discovery waits.
+    with ThreadPoolExecutor(max_workers=1) as ex:
+        ex.submit(preload_private_key, key_path)
+        token_aud = get_token_endpoint(ingress_base, realm)
     hello_url = f"{ingress_base}/hello"
 
     log("Starting slot machine client (private_key_jwt)")
@@ -340,14 +340,32 @@ def main(argv: list[str] | None = None) -> int:
     log(f"Client ID: {client_id}")
 
     access_token: str | None = None
+    refresh_at = 0.0
+    next_tick = time.monotonic()
+
+    # Only spinId and ts change between hellos; the rest of the body is encoded once
+    hello_head = f'{{"machineId":{compact_json(machine_id)},"spinId":"spin-'.encode("utf-8")
+    hello_mid = f'","bet":{bet},"ts":'.encode("ascii")
 
     log("Calling protected API via Envoy (loop)")
 
     try:
         while True:
-            if access_token is None:
+            # Fixed cadence: iterations start `interval` apart no matter how
+            # long the calls in between took
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            elif delay < -interval:
+                # More than a tick behind (slow call); don't burst to catch up
+                next_tick = time.monotonic()
+            next_tick += interval
+
+            now = time.time()
+            # Renew shortly before expiry instead of spending a hello call on a stale token
+            if access_token is None or now >= refresh_at:
                 try:
-                    access_token, _token_exp = fetch_access_token(
+                    access_token, token_exp = fetch_access_token(
                         token_url=token_url,
                         token_aud=token_aud,
                         client_id=client_id,
@@ -356,17 +374,14 @@ def main(argv: list[str] | None = None) -> int:
                         token_max_age=token_max_age,
                     )
                     log("Access token received", LogLevel.SUCCESS)
+                    lifetime = token_exp - now
+                    refresh_at = token_exp - min(TOKEN_REFRESH_SKEW, lifetime / 2)
                 except (HTTPError, URLError, RuntimeError) as e:
                     log(f"Token request failed: {e}", LogLevel.ERROR)
-                    time.sleep(interval)
                     continue
 
-            payload = {
-                "machineId": machine_id,
-                "spinId": f"spin-{int(time.time())}",
-                "bet": bet,
-                "ts": int(time.time()),
-            }
+            ts = b"%d" % int(now)
+            payload = b"".join((hello_head, ts, hello_mid, ts, b"}"))
 
             try:
                 status, body = post_json(
@@ -378,7 +393,6 @@ def main(argv: list[str] | None = None) -> int:
             except (HTTPError, URLError) as e:
                 log(f"Hello call failed: {e}", LogLevel.ERROR)
                 access_token = None
-                time.sleep(interval)
                 continue
 
             if status < 400:
@@ -387,13 +401,11 @@ def main(argv: list[str] | None = None) -> int:
                 log(f"API response status: {status}", LogLevel.ERROR)
             print(body)
 
-            if status >= 400:
-                log("Call failed; refreshing token and continuing", LogLevel.ERROR)
+            if status == 401:
+                log("Token rejected; refreshing token and continuing", LogLevel.ERROR)
                 access_token = None
-                time.sleep(interval)
-                continue
-
-            time.sleep(interval)
+            elif status >= 400:
+                log("Call failed; continuing", LogLevel.ERROR)
     except KeyboardInterrupt:
         log("Stopped by user")
         return 0
@@ -0,0 +1,242 @@
+"""
+Helpers shared by the client scripts: pooled stdlib HTTP, cached OIDC
+discovery and RS256 JWT building/signing.
+
+The scripts are run by path, which puts client/ on sys.path, so they import
+this module as a plain sibling.
+"""
+
+import binascii
+import functools
+import http.client
+import io
+import json
+import os
+import re
+import subprocess
+import time
+import urllib.parse
+from urllib.error import HTTPError, URLError
+
+try:
+    import fcntl
+except ImportError:  # Windows: the disk cache then skips locking
+    fcntl = None
+
+try:
+    # Optional: sign in-process instead of forking openssl for every JWT
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import padding
+    from cryptography.hazmat.primitives.serialization import load_pem_private_key
+except ImportError:
+    load_pem_private_key = None
+
+
+_URLSAFE = bytes.maketrans(b"+/", b"-_")
+
+
+def b64url_bytes(data: bytes) -> bytes:
+    """Unpadded base64url as ASCII bytes (C encoder + translate, no rstrip scan)."""
+    out = binascii.b2a_base64(data, newline=False).translate(_URLSAFE)
+    pad = -len(data) % 3
+    return out[:-pad] if pad else out
+
+
+# One reusable compact encoder; json.dumps(..., separators=...) builds a new
+# JSONEncoder on every call.
+compact_json = json.JSONEncoder(separators=(",", ":")).encode
+
+
+def b64url_json(obj: dict) -> bytes:
+    """Compact JSON, base64url-encoded without padding, as ASCII bytes."""
+    return b64url_bytes(compact_json(obj).encode("utf-8"))
+
+
+@functools.lru_cache(maxsize=8)
+def jwt_header_b64(kid: str | None = None) -> bytes:
+    """Encoded RS256 JWT header; constant per kid, so it is built once."""
+    header = {"alg": "RS256", "typ": "JWT"}
+    if kid:
+        header["kid"] = kid
+    return b64url_json(header)
+
+
+# One keep-alive connection per (scheme, host:port). Keycloak and hello are
+# both routed through the same ingress, so every call reuses one socket.
+_CONNS: dict[tuple[str, str], http.client.HTTPConnection] = {}
+
+
+# Errors that mean a reused keep-alive socket was already dead when we wrote
+# to it (RemoteDisconnected is a ConnectionResetError).
+_STALE_CONN_ERRORS = (ConnectionResetError, BrokenPipeError)
+
+
+def http_request(
+    method: str,
+    url: str,
+    body: bytes | None = None,
+    headers: dict | None = None,
+    timeout: int = 10,
+) -> tuple[http.client.HTTPResponse, bytes]:
+    """Send one request over the pooled connection; network errors raise URLError."""
+    parts = urllib.parse.urlsplit(url)
+    key = (parts.scheme, parts.netloc)
+    target = parts.path or "/"
+    if parts.query:
+        target += "?" + parts.query
+
+    while True:
+        conn = _CONNS.get(key)
+        reused = conn is not None
+        if conn is None:
+            cls = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+            conn = _CONNS[key] = cls(parts.netloc, timeout=timeout)
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        try:
+            conn.request(method, target, body=body, headers=headers or {})
+            resp = conn.getresponse()
+            return resp, resp.read()
+        except (http.client.HTTPException, OSError) as e:
+            conn.close()
+            del _CONNS[key]
+            # Only a kept-alive socket the server had already closed is retried,
+            # once, on a fresh connection. Anything else (a timeout in
+            # particular) may mean the request was processed, and resending a
+            # POST would duplicate it.
+            if not (reused and isinstance(e, _STALE_CONN_ERRORS)):
+                raise URLError(e) from e
+
+
+def raise_for_status(url: str, resp: http.client.HTTPResponse, data: bytes) -> None:
+    if resp.status >= 400:
+        raise HTTPError(url, resp.status, resp.reason, resp.headers, io.BytesIO(data))
+
+
+# Discovery results are also kept on disk in one small JSON map of
+# url -> {token_endpoint, expires_at}, so repeated CLI runs skip the round
+# trip. Lifetime follows Cache-Control max-age, DISCO_DEFAULT_TTL if absent.
+DISCO_CACHE = os.path.join(os.path.expanduser("~"), ".cache", "deviceoidc", "disco.json")
+DISCO_DEFAULT_TTL = 3600
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+def _fresh(entry, now: float) -> bool:
+    try:
+        return now < entry["expires_at"] and bool(entry["token_endpoint"])
+    except (KeyError, TypeError):
+        return False
+
+
+def _read_disco_cache() -> dict:
+    # Writers swap the file in with os.replace, so readers need no lock
+    try:
+        with open(DISCO_CACHE, "rb") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def _store_disco_cache(url: str, token_endpoint: str, ttl: int) -> None:
+    # Best effort: a read-only or missing home just means no disk cache.
+    # The lock file serialises read-modify-write between parallel shells.
+    try:
+        os.makedirs(os.path.dirname(DISCO_CACHE), exist_ok=True)
+        with open(DISCO_CACHE + ".lock", "w") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            now = time.time()
+            cache = {k: v for k, v in _read_disco_cache().items() if _fresh(v, now)}
+            cache[url] = {"token_endpoint": token_endpoint, "expires_at": now + ttl}
+            tmp = f"{DISCO_CACHE}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(cache, f)
+            os.replace(tmp, DISCO_CACHE)
+    except OSError:
+        pass
+
+
+@functools.lru_cache(maxsize=32)
+def get_token_endpoint(ingress_base: str, realm: str) -> str:
+    url = f"{ingress_base}/realms/{realm}/.well-known/openid-configuration"
+    entry = _read_disco_cache().get(url)
+    if _fresh(entry, time.time()):
+        return entry["token_endpoint"]
+
+    resp, raw = http_request("GET", url, headers={"Host": "keycloak.local"}, timeout=10)
+    raise_for_status(url, resp, raw)
+    token_endpoint = json.loads(raw)["token_endpoint"]
+
+    cache_control = resp.headers.get("Cache-Control") or ""
+    if "no-store" not in cache_control and "no-cache" not in cache_control:
+        m = _MAX_AGE_RE.search(cache_control)
+        ttl = int(m.group(1)) if m else DISCO_DEFAULT_TTL
+        if ttl > 0:
+            _store_disco_cache(url, token_endpoint, ttl)
+    return token_endpoint
+
+
+# ---------- Minimal RS256 signing ----------
+# Python stdlib has no RSA signer. If the optional `cryptography` package is installed we
+# sign in-process; otherwise we shell out to openssl (available on macOS / most dev boxes).
+# This keeps the scripts dependency-free while still being reproducible.
+
+def sign_rs256_with_openssl(message: bytes, private_key_path: str) -> bytes:
+    """
+    Returns RSA PKCS#1 v1.5 + SHA-256 signature of `message`.
+    Requires `openssl` in PATH.
+
+    Equivalent to:
+      openssl dgst -sha256 -sign key.pem
+    """
+    try:
+        p = subprocess.run(
+            ["openssl", "dgst", "-sha256", "-sign", private_key_path],
+            input=message,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            check=True,
+        )
+        return p.stdout
+    except FileNotFoundError:
+        raise RuntimeError("openssl not found. Install it or put it on PATH.")
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"openssl signing failed: {e.stderr.decode('utf-8', 'ignore')}")
+
+
+# Keyed by mtime too, so a rotated key file is picked up without a restart
+@functools.lru_cache(maxsize=4)
+def _load_private_key(private_key_path: str, mtime_ns: int):
+    try:
+        with open(private_key_path, "rb") as f:
+            return load_pem_private_key(f.read(), password=None)
+    except (OSError, ValueError, TypeError) as e:
+        raise RuntimeError(f"cannot load private key {private_key_path}: {e}")
+
+
+def private_key(private_key_path: str):
+    try:
+        mtime_ns = os.stat(private_key_path).st_mtime_ns
+    except OSError as e:
+        raise RuntimeError(f"cannot load private key {private_key_path}: {e}")
+    return _load_private_key(private_key_path, mtime_ns)
+
+
+def preload_private_key(private_key_path: str) -> None:
+    """Warm the key cache; any load error is reported again by the first sign."""
+    if load_pem_private_key is None:
+        return
+    try:
+        private_key(private_key_path)
+    except RuntimeError:
+        pass
+
+
+def sign_rs256(message: bytes, private_key_path: str) -> bytes:
+    """RSA PKCS#1 v1.5 + SHA-256 signature; uses cryptography when installed, else openssl."""
+    if load_pem_private_key is None:
+        return sign_rs256_with_openssl(message, private_key_path)
+    key = private_key(private_key_path)
+    return key.sign(message, padding.PKCS1v15(), hashes.SHA256())